@@ -29,6 +29,12 @@ CONFIG_DIR="$HOME/.config/shellmate"
 CONFIG_FILE="$CONFIG_DIR/config"
 INSTALL_DIR="/usr/local/bin"
 
+# Tool availability - probe PATH once at startup instead of per call site
+HAS_AWS=false; command -v aws >/dev/null 2>&1 && HAS_AWS=true
+HAS_SAM=false; command -v sam >/dev/null 2>&1 && HAS_SAM=true
+HAS_JQ=false;  command -v jq >/dev/null 2>&1 && HAS_JQ=true
+HAS_YQ=false;  command -v yq >/dev/null 2>&1 && HAS_YQ=true
+
 
 print_info() { echo -e "${BLUE}[INFO]${NC} $1"; }
 print_success() { echo -e "${GREEN}[SUCCESS]${NC} $1"; }
@@ -48,7 +54,7 @@ get_model_config() {
     fi
     
     # Extract model configurations using yq or basic parsing
-    if command -v yq >/dev/null 2>&1; then
+    if [ "$HAS_YQ" = true ]; then
         # Use yq if available for precise YAML parsing
         yq eval '.Mappings.ModelConfig' "$TEMPLATE_FILE" 2>/dev/null
     else
@@ -62,7 +68,7 @@ get_model_config() {
 }
 
 get_model_list() {
-    if command -v yq >/dev/null 2>&1; then
+    if [ "$HAS_YQ" = true ]; then
         yq eval '.Mappings.ModelConfig | keys' "$TEMPLATE_FILE" 2>/dev/null | \
         grep -v '^\[' | grep -v '^\]' | sed 's/^- //' | sed 's/"//g'
     else
@@ -84,7 +90,7 @@ get_model_list() {
 get_model_details() {
     local model="$1"
     
-    if command -v yq >/dev/null 2>&1; then
+    if [ "$HAS_YQ" = true ]; then
         echo "Model ID: $(yq eval ".Mappings.ModelConfig.\"$model\".ModelId" "$TEMPLATE_FILE" 2>/dev/null)"
         echo "Requires Profile: $(yq eval ".Mappings.ModelConfig.\"$model\".RequiresProfile" "$TEMPLATE_FILE" 2>/dev/null)"
         echo "Description: $(yq eval ".Mappings.ModelConfig.\"$model\".Description" "$TEMPLATE_FILE" 2>/dev/null)"
@@ -159,11 +165,11 @@ check_prerequisites() {
     
     # Check AWS CLI for deployment commands
     if [[ "$1" =~ ^(deploy|redeploy|destroy|status|logs|switch-model|enable-profiles|disable-profiles|api-key)$ ]]; then
-        if ! command -v aws >/dev/null 2>&1; then
+        if [ "$HAS_AWS" != true ]; then
             missing+=("aws-cli")
         fi
         if [[ "$1" =~ ^(deploy|redeploy|destroy|switch-model|enable-profiles|disable-profiles)$ ]]; then
-            if ! command -v sam >/dev/null 2>&1; then
+            if [ "$HAS_SAM" != true ]; then
                 missing+=("sam-cli")
             fi
         fi
@@ -202,10 +208,14 @@ install_config() {
     
     # Copy and make executable
     if [ ! -w "$INSTALL_DIR" ]; then
-        sudo cp "$SCRIPT_DIR/src/shellmate.sh" "$INSTALL_DIR/shellmate-sh"
-        sudo chmod +x "$INSTALL_DIR/shellmate-sh"
-        # Create symlink for easy access
-        sudo ln -sf "$INSTALL_DIR/shellmate-sh" "$INSTALL_DIR/shellmate"
+        # Single sudo invocation: one auth round trip and one fork/exec
+        # instead of three (symlink created for easy access). Paths are
+        # passed as positional parameters so special characters in the
+        # clone path can't break out of the command string.
+        sudo sh -c 'cp "$1" "$2" && chmod +x "$2" && ln -sf "$2" "$3"' _ \
+            "$SCRIPT_DIR/src/shellmate.sh" \
+            "$INSTALL_DIR/shellmate-sh" \
+            "$INSTALL_DIR/shellmate"
     else
         cp "$SCRIPT_DIR/src/shellmate.sh" "$INSTALL_DIR/shellmate-sh"
         chmod +x "$INSTALL_DIR/shellmate-sh"
@@ -232,14 +242,29 @@ setup_config() {
     local endpoint=""
     local api_key=""
     
-    if command -v aws >/dev/null 2>&1; then
-        endpoint=$(aws cloudformation describe-stacks --stack-name "$DEFAULT_STACK_NAME" --region "$DEFAULT_REGION" --query "Stacks[0].Outputs[?OutputKey=='ApiEndpoint'].OutputValue" --output text 2>/dev/null || true)
-        if [ "$endpoint" != "None" ] && [ -n "$endpoint" ]; then
-            # Use CloudFormation tags to find the API key (same logic as show_api_key function)
-            local api_keys=$(aws apigateway get-api-keys --region "$DEFAULT_REGION" --include-values --query "items[?contains(tags.\"aws:cloudformation:stack-name\", '$DEFAULT_STACK_NAME')]" --output json 2>/dev/null)
-            if [ -n "$api_keys" ] && [ "$api_keys" != "[]" ]; then
-                api_key=$(echo "$api_keys" | jq -r '.[0].value' 2>/dev/null || true)
-            fi
+    if [ "$HAS_AWS" = true ]; then
+        # The CloudFormation and API Gateway lookups are independent - run them
+        # concurrently to roughly halve AWS discovery time
+        local endpoint_file api_keys_file
+        endpoint_file=$(mktemp)
+        api_keys_file=$(mktemp)
+        aws cloudformation describe-stacks --stack-name "$DEFAULT_STACK_NAME" --region "$DEFAULT_REGION" --query "Stacks[0].Outputs[?OutputKey=='ApiEndpoint'].OutputValue" --output text > "$endpoint_file" 2>/dev/null &
+        local cf_pid=$!
+        # Use CloudFormation tags to find the API key (same logic as show_api_key function)
+        aws apigateway get-api-keys --region "$DEFAULT_REGION" --include-values --name-query "$DEFAULT_STACK_NAME" --query "items[?contains(tags.\"aws:cloudformation:stack-name\", '$DEFAULT_STACK_NAME')] | [0].value" --output text > "$api_keys_file" 2>/dev/null &
+        local apig_pid=$!
+        wait "$cf_pid" || true
+        wait "$apig_pid" || true
+
+        endpoint=$(<"$endpoint_file")
+        api_key=$(<"$api_keys_file")
+        rm -f "$endpoint_file" "$api_keys_file"
+
+        if [ "$endpoint" = "None" ]; then
+            endpoint=""
+        fi
+        if [ "$api_key" = "None" ] || [ -z "$endpoint" ]; then
+            api_key=""
         fi
     fi
     
@@ -329,7 +354,7 @@ setup_shell_integration() {
             ;;
     esac
     
-    if [ -f "$shell_rc" ] && ! grep -q "shellmate.*config" "$shell_rc"; then
+    if [ -f "$shell_rc" ] && ! grep -qF "$CONFIG_FILE" "$shell_rc"; then
         echo >> "$shell_rc"
         echo "# ShellMate configuration" >> "$shell_rc"
         echo "source $CONFIG_FILE" >> "$shell_rc"
@@ -454,14 +479,26 @@ deploy_aws() {
         --no-fail-on-empty-changeset \
         --resolve-s3
     
-    # Get outputs and save configuration
+    # Get outputs and save configuration (the two lookups are independent,
+    # so run them concurrently - consistent with setup_config function)
     print_info "Retrieving deployment information..."
-    local endpoint=$(aws cloudformation describe-stacks --stack-name "$stack_name" --region "$region" --query "Stacks[0].Outputs[?OutputKey=='ApiEndpoint'].OutputValue" --output text)
-    # Use CloudFormation tags to find the API key (consistent with setup_config function)
-    local api_keys=$(aws apigateway get-api-keys --region "$region" --include-values --query "items[?contains(tags.\"aws:cloudformation:stack-name\", '$stack_name')]" --output json 2>/dev/null)
-    local api_key=""
-    if [ -n "$api_keys" ] && [ "$api_keys" != "[]" ]; then
-        api_key=$(echo "$api_keys" | jq -r '.[0].value' 2>/dev/null || true)
+    local endpoint_file api_keys_file
+    endpoint_file=$(mktemp)
+    api_keys_file=$(mktemp)
+    aws cloudformation describe-stacks --stack-name "$stack_name" --region "$region" --query "Stacks[0].Outputs[?OutputKey=='ApiEndpoint'].OutputValue" --output text > "$endpoint_file" 2>/dev/null &
+    local cf_pid=$!
+    # Use CloudFormation tags to find the API key
+    aws apigateway get-api-keys --region "$region" --include-values --name-query "$stack_name" --query "items[?contains(tags.\"aws:cloudformation:stack-name\", '$stack_name')] | [0].value" --output text > "$api_keys_file" 2>/dev/null &
+    local apig_pid=$!
+    wait "$cf_pid" || true
+    wait "$apig_pid" || true
+
+    local endpoint=$(<"$endpoint_file")
+    local api_key=$(<"$api_keys_file")
+    rm -f "$endpoint_file" "$api_keys_file"
+
+    if [ "$api_key" = "None" ]; then
+        api_key=""
     fi
     
     if [ -n "$endpoint" ] && [ "$endpoint" != "None" ]; then
@@ -532,7 +569,7 @@ show_status() {
     fi
     
     # AWS status
-    if command -v aws >/dev/null 2>&1; then
+    if [ "$HAS_AWS" = true ]; then
         local stack_status=$(aws cloudformation describe-stacks --stack-name "$DEFAULT_STACK_NAME" --region "$DEFAULT_REGION" --query "Stacks[0].StackStatus" --output text 2>/dev/null || echo "NOT_FOUND")
         
         if [ "$stack_status" = "CREATE_COMPLETE" ] || [ "$stack_status" = "UPDATE_COMPLETE" ]; then
@@ -541,7 +578,7 @@ show_status() {
             # Show configuration details
             local outputs=$(aws cloudformation describe-stacks --stack-name "$DEFAULT_STACK_NAME" --region "$DEFAULT_REGION" --query "Stacks[0].Outputs" --output json 2>/dev/null || echo "[]")
             
-            if command -v jq >/dev/null 2>&1; then
+            if [ "$HAS_JQ" = true ]; then
                 echo "$outputs" | jq -r '.[] | "  \(.OutputKey): \(.OutputValue)"' 2>/dev/null | while read line; do
                     print_info "$line"
                 done
@@ -559,7 +596,7 @@ show_status() {
 list_models() {
     print_header "AVAILABLE MODELS (from template.yaml)"
     
-    if ! command -v yq >/dev/null 2>&1; then
+    if [ "$HAS_YQ" != true ]; then
         print_warning "Install 'yq' for enhanced model information display"
         echo
     fi
@@ -578,7 +615,7 @@ list_models() {
     while IFS= read -r model; do
         echo -e "${BOLD}  $model${NC}"
         
-        if command -v yq >/dev/null 2>&1; then
+        if [ "$HAS_YQ" = true ]; then
             local model_id=$(yq eval ".Mappings.ModelConfig.\"$model\".ModelId" "$TEMPLATE_FILE" 2>/dev/null)
             local description=$(yq eval ".Mappings.ModelConfig.\"$model\".Description" "$TEMPLATE_FILE" 2>/dev/null)
             local requires_profile=$(yq eval ".Mappings.ModelConfig.\"$model\".RequiresProfile" "$TEMPLATE_FILE" 2>/dev/null)
@@ -611,7 +648,7 @@ switch_model() {
     
     # Check if model requires inference profile
     local requires_profile="false"
-    if command -v yq >/dev/null 2>&1; then
+    if [ "$HAS_YQ" = true ]; then
         requires_profile=$(yq eval ".Mappings.ModelConfig.\"$new_model\".RequiresProfile" "$TEMPLATE_FILE" 2>/dev/null)
     fi
     
@@ -670,13 +707,15 @@ show_api_key() {
         exit 1
     fi
     
-    # Get API key from API Gateway
+    # Get API key from API Gateway - stream the CLI output straight into a
+    # single jq pass instead of buffering the key list and parsing it twice
     print_info "Retrieving API key from AWS API Gateway..."
-    local api_keys=$(aws apigateway get-api-keys --region "$region" --include-values --query "items[?contains(tags.\"aws:cloudformation:stack-name\", '$stack_name')]" --output json 2>/dev/null)
-    
-    if [ -n "$api_keys" ] && [ "$api_keys" != "[]" ]; then
-        local api_key=$(echo "$api_keys" | jq -r '.[0].value' 2>/dev/null)
-        local api_key_name=$(echo "$api_keys" | jq -r '.[0].name' 2>/dev/null)
+    local key_info
+    key_info=$(aws apigateway get-api-keys --region "$region" --include-values --name-query "$stack_name" --query "items[?contains(tags.\"aws:cloudformation:stack-name\", '$stack_name')]" --output json 2>/dev/null | jq -r '.[0] // empty | [.value, .name] | @tsv' 2>/dev/null)
+
+    if [ -n "$key_info" ]; then
+        local api_key="${key_info%%$'\t'*}"
+        local api_key_name="${key_info#*$'\t'}"
         
         if [ -n "$api_key" ] && [ "$api_key" != "null" ]; then
             echo -e "\n${BOLD}Current Configuration:${NC}"
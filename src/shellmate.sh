@@ -12,10 +12,28 @@ SHELLMATE_API_KEY="${SHELLMATE_API_KEY:-}"
 SHELLMATE_CONFIG_DIR="${HOME}/.config/shellmate"
 SHELLMATE_CONFIG_FILE="${SHELLMATE_CONFIG_DIR}/config"
 
-# Load config if it exists
-if [[ -f "$SHELLMATE_CONFIG_FILE" ]]; then
-    source "$SHELLMATE_CONFIG_FILE"
-fi
+# Query cache - repeat queries skip the API round trip entirely.
+# Set SHELLMATE_CACHE=false to disable.
+SHELLMATE_CACHE_DIR="${SHELLMATE_CACHE_DIR:-${XDG_CACHE_HOME:-$HOME/.cache}/shellmate/queries}"
+SHELLMATE_CACHE_TTL_DAYS="${SHELLMATE_CACHE_TTL_DAYS:-7}"
+SHELLMATE_CACHE_MAX=1000
+
+# Request payload template - defined once, filled per query with printf
+JSON_PAYLOAD_TEMPLATE='{
+    "query": "%s",
+    "context": {
+        "os": "%s",
+        "cwd": "%s"
+    }
+}'
+
+# Load config if it exists - deferred until a query actually needs it, so
+# --help and argument errors skip the disk read and source entirely
+load_config() {
+    if [[ -f "$SHELLMATE_CONFIG_FILE" ]]; then
+        source "$SHELLMATE_CONFIG_FILE"
+    fi
+}
 
 # Helper functions
 error() {
@@ -30,39 +48,80 @@ warn() {
     echo "$1"
 }
 
-# Check if jq is available for JSON parsing
-has_jq() {
-    command -v jq >/dev/null 2>&1
-}
+# Probe for jq once at startup - command -v costs a PATH scan per call
+HAS_JQ=false
+command -v jq >/dev/null 2>&1 && HAS_JQ=true
 
 # Parse JSON without jq (basic implementation)
 parse_json_command() {
     local json="$1"
-    # Extract command field using sed/grep
-    echo "$json" | sed -n 's/.*"command"[[:space:]]*:[[:space:]]*"\([^"]*\)".*/\1/p' | head -1
+    # Extract command field with bash's regex engine - no sed/head subprocesses
+    if [[ "$json" =~ \"command\"[[:space:]]*:[[:space:]]*\"([^\"]*)\" ]]; then
+        echo "${BASH_REMATCH[1]}"
+    fi
+}
+
+# Hash a cache key with whatever digest tool is available
+hash_key() {
+    local key="$1"
+    if command -v sha256sum >/dev/null 2>&1; then
+        echo "$key" | sha256sum | cut -d' ' -f1
+    elif command -v shasum >/dev/null 2>&1; then
+        echo "$key" | shasum -a 256 | cut -d' ' -f1
+    else
+        echo "$key" | cksum | tr ' \t' '__'
+    fi
+}
+
+# Print the cached command for a cache file, failing if absent or expired
+cache_lookup() {
+    local cache_file="$1"
+    [[ -f "$cache_file" ]] || return 1
+    [[ -n "$(find "$cache_file" -mtime -"$SHELLMATE_CACHE_TTL_DAYS" 2>/dev/null)" ]] || return 1
+    cat "$cache_file"
+}
+
+# Store a command in the cache, evicting the oldest entries past capacity
+cache_store() {
+    local cache_file="$1"
+    local command="$2"
+    mkdir -p "$SHELLMATE_CACHE_DIR" 2>/dev/null || return 0
+    printf '%s\n' "$command" > "$cache_file" 2>/dev/null || return 0
+    local entries
+    entries=$(ls -1 "$SHELLMATE_CACHE_DIR" 2>/dev/null | wc -l)
+    if [[ "$entries" -gt "$SHELLMATE_CACHE_MAX" ]]; then
+        ls -1t "$SHELLMATE_CACHE_DIR" | tail -n +$((SHELLMATE_CACHE_MAX + 1)) | \
+            while IFS= read -r old; do rm -f "$SHELLMATE_CACHE_DIR/$old"; done
+    fi
 }
 
 # Query AI service
 query_ai() {
     local query="$1"
-    
+
     if [[ -z "$SHELLMATE_API_ENDPOINT" ]]; then
         error "SHELLMATE_API_ENDPOINT not set. Run installation or set environment variable."
         return 1
     fi
-    
-    # Prepare JSON payload
+
+    local os_name cwd
+    os_name="$(uname -s)"
+    cwd="$(pwd)"
+
+    # Serve repeat queries from the on-disk cache
+    local cache_file=""
+    if [[ "${SHELLMATE_CACHE:-true}" == "true" ]]; then
+        cache_file="$SHELLMATE_CACHE_DIR/$(hash_key "$os_name|$cwd|$query")"
+        local cached
+        if cached=$(cache_lookup "$cache_file"); then
+            echo "$cached"
+            return 0
+        fi
+    fi
+
+    # Fill the payload template in-process - no cat/heredoc subprocess
     local json_payload
-    json_payload=$(cat <<EOF
-{
-    "query": "$query",
-    "context": {
-        "os": "$(uname -s)",
-        "cwd": "$(pwd)"
-    }
-}
-EOF
-)
+    printf -v json_payload "$JSON_PAYLOAD_TEMPLATE" "$query" "$os_name" "$cwd"
     
     # Make API request
     local response
@@ -72,32 +131,49 @@ EOF
         headers+=(-H "X-API-Key: $SHELLMATE_API_KEY")
     fi
     
-    response=$(curl -s -X POST "${headers[@]}" -d "$json_payload" "$SHELLMATE_API_ENDPOINT" 2>/dev/null)
+    # Bound the handshake and transfer so a stalled connection can't hang the
+    # shell hook; retry transient failures quickly instead of giving up
+    response=$(curl -s --connect-timeout 5 --max-time 30 --retry 2 --retry-delay 0 \
+        -X POST "${headers[@]}" -d "$json_payload" "$SHELLMATE_API_ENDPOINT" 2>/dev/null)
     
     if [[ $? -ne 0 ]] || [[ -z "$response" ]]; then
         error "Failed to connect to ShellMate API"
         return 1
     fi
     
-    # Check for error in response
-    if echo "$response" | grep -q '"error"'; then
+    # Check for error in response (bash substring match - no extra fork)
+    if [[ "$response" == *'"error"'* ]]; then
         error "API returned error: $response"
         return 1
     fi
     
-    # Extract command from JSON response
+    # Extract command from JSON response. Try the in-process regex parser
+    # first and short-circuit on success - jq is only forked when the
+    # captured value contains a backslash, i.e. any JSON escape: the simple
+    # parser returns escapes un-decoded (\\b stays \\b) and escaped quotes
+    # truncate the capture outright, so neither result is safe to run.
     local command
-    if has_jq; then
-        command=$(echo "$response" | jq -r '.command // empty')
-    else
-        command=$(parse_json_command "$response")
+    command=$(parse_json_command "$response")
+    if [[ -z "$command" || "$command" == *'\'* ]]; then
+        if [[ "$HAS_JQ" == "true" ]]; then
+            command=$(jq -r '.command // empty' <<<"$response")
+        elif [[ -n "$command" ]]; then
+            # Without jq the escapes cannot be decoded - refuse to return
+            # (and cache) a command that differs from what the API sent
+            error "Response contains JSON escapes; install jq to parse it"
+            return 1
+        fi
     fi
     
     if [[ -z "$command" ]]; then
         error "No command returned from API"
         return 1
     fi
-    
+
+    if [[ -n "$cache_file" ]]; then
+        cache_store "$cache_file" "$command"
+    fi
+
     echo "$command"
 }
 
@@ -112,27 +188,36 @@ execute_command() {
     fi
     
     if [[ "$seamless" == "true" ]]; then
-        # Seamless mode - just output the command
-        echo "$command"
+        # Seamless mode - emit the command verbatim. printf '%s' never
+        # interprets backslashes, unlike echo under xpg_echo/sh emulation,
+        # so commands with escapes survive the shell-function round trip.
+        printf '%s\n' "$command"
         return 0
     fi
     
-    # Interactive mode - pre-populate command for editing
+    # Interactive mode - pre-populate command for editing. Strip the shell
+    # path with parameter expansion instead of forking basename.
     local shell_name
-    shell_name=$(basename "${SHELL:-/bin/bash}")
-    local prompt_char="$ "
-    [[ "$shell_name" == "zsh" ]] && prompt_char="% "
+    shell_name="${SHELL:-/bin/bash}"
+    shell_name="${shell_name##*/}"
+    # case keeps this bash-3.2 compatible (macOS /bin/bash has no
+    # associative arrays)
+    local prompt_char
+    case "$shell_name" in
+        zsh) prompt_char='% ' ;;
+        *)   prompt_char='$ ' ;;
+    esac
     
     # Check if we should show prompt
-    local show_prompt="${SHELLMATE_SHOW_PROMPT:-true}"
-    if [[ "$show_prompt" == "true" ]]; then
+    if [[ "$SHOW_PROMPT" == "true" ]]; then
         echo "Press Enter to execute, or Ctrl+C to cancel:"
     fi
     
-    # Use read with pre-filled command
+    # Use read with pre-filled command; -p emits the prompt inside the same
+    # readline call instead of a separate echo, and keeps stdout clean for
+    # command substitution
     local user_command
-    echo -n "$prompt_char"
-    read -e -i "$command" user_command
+    read -e -p "$prompt_char" -i "$command" user_command
     
     if [[ -n "$user_command" ]]; then
         eval "$user_command"
@@ -181,7 +266,9 @@ EOF
                 exit 1
                 ;;
             *)
-                query="$1"
+                # Join positional words so unquoted multi-word queries work:
+                #   shellmate show disk usage
+                query="${query:+$query }$1"
                 shift
                 ;;
         esac
@@ -191,7 +278,16 @@ EOF
         error "No query provided. Use --help for usage information."
         exit 1
     fi
-    
+
+    load_config
+
+    # Resolve display preference once - the env can't change mid-run.
+    # Accept the usual truthy spellings rather than only the literal "true".
+    case "${SHELLMATE_SHOW_PROMPT:-true}" in
+        true|1|yes|on|y) SHOW_PROMPT="true" ;;
+        *) SHOW_PROMPT="false" ;;
+    esac
+
     # Get command from AI
     local command
     command=$(query_ai "$query")
@@ -204,11 +300,8 @@ EOF
     fi
     
     # Execute or display command
-    if [[ "$seamless" != "true" ]]; then
-        local show_prompt="${SHELLMATE_SHOW_PROMPT:-true}"
-        if [[ "$show_prompt" == "true" ]]; then
-            info "Query: $query"
-        fi
+    if [[ "$seamless" != "true" && "$SHOW_PROMPT" == "true" ]]; then
+        info "Query: $query"
     fi
     
     execute_command "$command" "$seamless"